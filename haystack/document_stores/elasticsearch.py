@@ -24,7 +24,7 @@ except (ImportError, ModuleNotFoundError) as ie:
 from haystack.document_stores import KeywordDocumentStore
 from haystack.schema import Document, Label
 from haystack.document_stores.base import get_batches_from_generator
-from haystack.document_stores.filter_utils import LogicalFilterClause
+from haystack.document_stores.filter_utils import convert_filters_to_elasticsearch
 
 
 logger = logging.getLogger(__name__)
@@ -536,7 +536,7 @@ class ElasticsearchDocumentStore(KeywordDocumentStore):
         if filters:
             if not body.get("query"):
                 body["query"] = {"bool": {}}
-            body["query"]["bool"].update({"filter": LogicalFilterClause.parse(filters).convert_to_elasticsearch()})
+            body["query"]["bool"].update({"filter": convert_filters_to_elasticsearch(filters)})
         result = self.client.search(body=body, index=index, headers=headers)
         buckets = result["aggregations"]["metadata_agg"]["buckets"]
         for bucket in buckets:
@@ -720,7 +720,7 @@ class ElasticsearchDocumentStore(KeywordDocumentStore):
             body["query"]["bool"]["must_not"] = [{"exists": {"field": self.embedding_field}}]
 
         if filters:
-            body["query"]["bool"]["filter"] = LogicalFilterClause.parse(filters).convert_to_elasticsearch()
+            body["query"]["bool"]["filter"] = convert_filters_to_elasticsearch(filters)
 
         result = self.client.count(index=index, body=body, headers=headers)
         count = result["count"]
@@ -747,7 +747,7 @@ class ElasticsearchDocumentStore(KeywordDocumentStore):
 
         body: dict = {"query": {"bool": {"must": [{"exists": {"field": self.embedding_field}}]}}}
         if filters:
-            body["query"]["bool"]["filter"] = LogicalFilterClause.parse(filters).convert_to_elasticsearch()
+            body["query"]["bool"]["filter"] = convert_filters_to_elasticsearch(filters)
 
         result = self.client.count(index=index, body=body, headers=headers)
         count = result["count"]
@@ -890,7 +890,7 @@ class ElasticsearchDocumentStore(KeywordDocumentStore):
         body: dict = {"query": {"bool": {}}}
 
         if filters:
-            body["query"]["bool"]["filter"] = LogicalFilterClause.parse(filters).convert_to_elasticsearch()
+            body["query"]["bool"]["filter"] = convert_filters_to_elasticsearch(filters)
 
         if only_documents_without_embedding:
             body["query"]["bool"]["must_not"] = [{"exists": {"field": self.embedding_field}}]
@@ -1054,7 +1054,7 @@ class ElasticsearchDocumentStore(KeywordDocumentStore):
         if query is None:
             body = {"query": {"bool": {"must": {"match_all": {}}}}}  # type: Dict[str, Any]
             if filters:
-                body["query"]["bool"]["filter"] = LogicalFilterClause.parse(filters).convert_to_elasticsearch()
+                body["query"]["bool"]["filter"] = convert_filters_to_elasticsearch(filters)
 
         # Retrieval via custom query
         elif custom_query:  # substitute placeholder for query and filters for the custom_query template string
@@ -1091,7 +1091,7 @@ class ElasticsearchDocumentStore(KeywordDocumentStore):
             }
 
             if filters:
-                body["query"]["bool"]["filter"] = LogicalFilterClause.parse(filters).convert_to_elasticsearch()
+                body["query"]["bool"]["filter"] = convert_filters_to_elasticsearch(filters)
 
         if self.excluded_meta_data:
             body["_source"] = {"excludes": self.excluded_meta_data}
@@ -1197,9 +1197,7 @@ class ElasticsearchDocumentStore(KeywordDocumentStore):
             # +1 in similarity to avoid negative numbers (for cosine sim)
             body = {"size": top_k, "query": self._get_vector_similarity_query(query_emb, top_k)}
             if filters:
-                body["query"]["script_score"]["query"] = {
-                    "bool": {"filter": LogicalFilterClause.parse(filters).convert_to_elasticsearch()}
-                }
+                body["query"]["script_score"]["query"] = {"bool": {"filter": convert_filters_to_elasticsearch(filters)}}
 
             excluded_meta_data: Optional[list] = None
 
@@ -1542,7 +1540,7 @@ class ElasticsearchDocumentStore(KeywordDocumentStore):
         index = index or self.index
         query: Dict[str, Any] = {"query": {}}
         if filters:
-            query["query"]["bool"] = {"filter": LogicalFilterClause.parse(filters).convert_to_elasticsearch()}
+            query["query"]["bool"] = {"filter": convert_filters_to_elasticsearch(filters)}
 
             if ids:
                 query["query"]["bool"]["must"] = {"ids": {"values": ids}}
@@ -1791,7 +1789,7 @@ class OpenSearchDocumentStore(ElasticsearchDocumentStore):
                 "query": self._get_vector_similarity_query(query_emb, top_k),
             }
             if filters:
-                body["query"]["bool"]["filter"] = LogicalFilterClause.parse(filters).convert_to_elasticsearch()
+                body["query"]["bool"]["filter"] = convert_filters_to_elasticsearch(filters)
 
             excluded_meta_data: Optional[list] = None
 
@@ -1,19 +1,141 @@
-from typing import Union, List, Dict
-from abc import ABC, abstractmethod
-from collections import defaultdict
+from typing import Union, List, Dict, Type, Any, Callable, Iterator, Optional
+import itertools
+from functools import lru_cache
 
 
-def nested_defaultdict():
+def convert_filters_to_elasticsearch(filters: Union[dict, List[dict]]) -> Dict:
     """
-    Data structure that recursively adds a dictionary as value if a key does not exist. Advantage: In nested dictionary
-    structures, we don't need to check if a key already exists (which can become hard to maintain in nested dictionaries
-    with many levels) but access the existing value if a key exists and create an empty dictionary if a key does not
-    exist.
+    Converts a filter dictionary/list to an Elasticsearch filter.
+
+    Filters that only differ in their comparison values share the same structure (e.g. a date range combined with a
+    genre filter). The conversion is therefore compiled once per filter structure into a function that only needs to
+    fill in the comparison values of the given filter, so parsing and converting is skipped for repeated structures.
+
+    :param filters: Dictionary or list that contains the filter definition.
+    """
+    comparison_values: List[Any] = []
+    try:
+        build_filter = _compile_filter_shape(_get_filter_shape(filters, comparison_values))
+    except RecursionError:
+        build_filter = None
+    # Filters that are nested too deeply to be compiled are parsed and converted directly
+    if build_filter is None:
+        return LogicalFilterClause.parse(filters).convert_to_elasticsearch()
+    return build_filter(comparison_values)
+
+
+class _Placeholder:
+    """
+    Stands in for the comparison value at position `index` while compiling a filter structure.
+    """
+
+    __slots__ = ("index",)
+
+    def __init__(self, index: int):
+        self.index = index
+
+
+def _get_filter_shape(filter_term: Union[dict, List[dict]], comparison_values: List[Any]) -> tuple:
+    """
+    Returns a hashable representation of the structure of a filter, i.e. the filter without its comparison values. The
+    comparison values are appended to `comparison_values` in the order in which they occur in the filter.
+    """
+    if isinstance(filter_term, dict):
+        return dict, _get_filter_items_shape(filter_term, comparison_values)
+    return list, tuple(_get_filter_items_shape(item, comparison_values) for item in filter_term)
+
+
+def _get_filter_items_shape(filter_item: dict, comparison_values: List[Any]) -> tuple:
+    items_shape = []
+    for key, value in filter_item.items():
+        if key in _LOGICAL_OPERATIONS:
+            items_shape.append((key, _get_filter_shape(value, comparison_values)))
+        # Key needs to be a metadata field, same distinction of comparison clauses as in `ComparisonOperation.parse`
+        elif isinstance(value, dict):
+            comparison_values.extend(value.values())
+            items_shape.append((key, (dict, tuple(value))))
+        elif isinstance(value, list):
+            comparison_values.append(value)
+            items_shape.append((key, (list, ())))
+        else:
+            comparison_values.append(value)
+            items_shape.append((key, (None, ())))
+    return tuple(items_shape)
+
+
+def _build_filter_template(filter_shape: tuple, placeholders: Iterator[_Placeholder]) -> Union[dict, List[dict]]:
+    """
+    Restores a filter from its structure with placeholders in place of the comparison values.
+    """
+    filter_type, items_shape = filter_shape
+    if filter_type is dict:
+        return _build_filter_items_template(items_shape, placeholders)
+    return [_build_filter_items_template(item_shape, placeholders) for item_shape in items_shape]
+
+
+def _build_filter_items_template(items_shape: tuple, placeholders: Iterator[_Placeholder]) -> dict:
+    filter_item: Dict[str, Any] = {}
+    for key, value_shape in items_shape:
+        if key in _LOGICAL_OPERATIONS:
+            filter_item[key] = _build_filter_template(value_shape, placeholders)
+        else:
+            value_type, comparison_operations = value_shape
+            if value_type is dict:
+                filter_item[key] = {operation: next(placeholders) for operation in comparison_operations}
+            elif value_type is list:
+                filter_item[key] = {"$in": next(placeholders)}
+            else:
+                filter_item[key] = {"$eq": next(placeholders)}
+    return filter_item
+
+
+@lru_cache(maxsize=256)
+def _compile_filter_shape(filter_shape: tuple) -> Optional[Callable[[List[Any]], Dict]]:
+    """
+    Compiles a filter structure into a function that takes the comparison values of a filter and returns the
+    Elasticsearch filter. Returns `None` if the structure is nested too deeply to be compiled.
+    """
+    placeholders = (_Placeholder(index) for index in itertools.count())
+    try:
+        filter_template = _build_filter_template(filter_shape, placeholders)
+        return _compile_template(LogicalFilterClause.parse(filter_template).convert_to_elasticsearch())
+    # The Python compiler limits the nesting of literals (SyntaxError, or MemoryError on Python < 3.9)
+    except (SyntaxError, MemoryError, RecursionError):
+        return None
+
+
+def _compile_template(template: Any) -> Callable[[List[Any]], Any]:
+    """
+    Compiles a query containing placeholders into a function that builds the query for the given comparison values.
+    The function consists of a single (nested) literal, so building the query doesn't involve any recursion. Keys and
+    other constants are passed to the function via a list and never become part of its source code.
     """
-    return defaultdict(nested_defaultdict)
+    constants: List[Any] = []
+    source = f"lambda comparison_values: {_get_template_source(template, constants)}"
+    # The source only contains indices into `comparison_values` and `constants`, never any content of the filter
+    return eval(compile(source, "<filter>", "eval"), {"constants": constants})  # pylint: disable=eval-used
 
 
-class LogicalFilterClause(ABC):
+def _get_template_source(template: Any, constants: List[Any]) -> str:
+    if isinstance(template, _Placeholder):
+        return f"comparison_values[{template.index}]"
+    if isinstance(template, dict):
+        items = (
+            f"{_get_constant_source(key, constants)}: {_get_template_source(value, constants)}"
+            for key, value in template.items()
+        )
+        return "{" + ", ".join(items) + "}"
+    if isinstance(template, list):
+        return "[" + ", ".join(_get_template_source(value, constants) for value in template) + "]"
+    return _get_constant_source(template, constants)
+
+
+def _get_constant_source(constant: Any, constants: List[Any]) -> str:
+    constants.append(constant)
+    return f"constants[{len(constants) - 1}]"
+
+
+class LogicalFilterClause:
     """
     Class that is able to parse a filter and convert it to the format that the underlying databases of our
     DocumentStores require.
@@ -81,6 +203,8 @@ class LogicalFilterClause(ABC):
 
     """
 
+    __slots__ = ("conditions",)
+
     def __init__(self, conditions: List["LogicalFilterClause"]):
         self.conditions = conditions
 
@@ -97,12 +221,9 @@ class LogicalFilterClause(ABC):
             filter_term = [filter_term]
         for item in filter_term:
             for key, value in item.items():
-                if key == "$not":
-                    conditions.append(NotOperation.parse(value))
-                elif key == "$and":
-                    conditions.append(AndOperation.parse(value))
-                elif key == "$or":
-                    conditions.append(OrOperation.parse(value))
+                logical_operation = _LOGICAL_OPERATIONS.get(key)
+                if logical_operation is not None:
+                    conditions.append(logical_operation.parse(value))
                 # Key needs to be a metadata field
                 else:
                     conditions.extend(ComparisonOperation.parse(key, value))
@@ -115,36 +236,27 @@ class LogicalFilterClause(ABC):
         else:
             return cls(conditions)
 
-    @abstractmethod
     def convert_to_elasticsearch(self):
         """
         Converts the LogicalFilterClause instance to an Elasticsearch filter.
         """
-        pass
+        raise NotImplementedError
 
-    def _merge_es_range_queries(self, conditions: List[Dict]) -> List[Dict]:
+    def _flatten_conditions(self, conditions: List["LogicalFilterClause"]) -> List["LogicalFilterClause"]:
         """
-        Merges Elasticsearch range queries that perform on the same metadata field.
+        Absorbs the conditions of nested operations of the same kind, e.g. `AND(a, AND(b, c))` becomes `AND(a, b, c)`.
         """
+        return [
+            nested_condition
+            for condition in conditions
+            for nested_condition in (condition.conditions if isinstance(condition, type(self)) else (condition,))
+        ]
 
-        range_conditions = [cond["range"] for cond in filter(lambda condition: "range" in condition, conditions)]
-        if range_conditions:
-            conditions = [condition for condition in conditions if "range" not in condition]
-            range_conditions_dict = nested_defaultdict()
-            for condition in range_conditions:
-                field_name = list(condition.keys())[0]
-                operation = list(condition[field_name].keys())[0]
-                comparison_value = condition[field_name][operation]
-                range_conditions_dict[field_name][operation] = comparison_value
 
-            for field_name, comparison_operations in range_conditions_dict.items():
-                conditions.append({"range": {field_name: comparison_operations}})
+class ComparisonOperation:
+    __slots__ = ("field_name", "comparison_value")
 
-        return conditions
-
-
-class ComparisonOperation(ABC):
-    def __init__(self, field_name: str, comparison_value: Union[str, float, List]):
+    def __init__(self, field_name: str, comparison_value: Union[str, float, List, Dict]):
         self.field_name = field_name
         self.comparison_value = comparison_value
 
@@ -153,23 +265,24 @@ class ComparisonOperation(ABC):
         comparison_operations: List[ComparisonOperation] = []
 
         if isinstance(comparison_clause, dict):
+            # Multiple range operators on the same field are combined into a single range query
+            range_clause = {
+                comparison_operation: comparison_value
+                for comparison_operation, comparison_value in comparison_clause.items()
+                if comparison_operation in _RANGE_OPERATORS
+            }
+            if len(range_clause) > 1:
+                comparison_operations.append(RangeOperation(field_name, range_clause))
+                comparison_clause = {
+                    comparison_operation: comparison_value
+                    for comparison_operation, comparison_value in comparison_clause.items()
+                    if comparison_operation not in range_clause
+                }
+
             for comparison_operation, comparison_value in comparison_clause.items():
-                if comparison_operation == "$eq":
-                    comparison_operations.append(EqOperation(field_name, comparison_value))
-                elif comparison_operation == "$in":
-                    comparison_operations.append(InOperation(field_name, comparison_value))
-                elif comparison_operation == "$ne":
-                    comparison_operations.append(NeOperation(field_name, comparison_value))
-                elif comparison_operation == "$nin":
-                    comparison_operations.append(NinOperation(field_name, comparison_value))
-                elif comparison_operation == "$gt":
-                    comparison_operations.append(GtOperation(field_name, comparison_value))
-                elif comparison_operation == "$gte":
-                    comparison_operations.append(GteOperation(field_name, comparison_value))
-                elif comparison_operation == "$lt":
-                    comparison_operations.append(LtOperation(field_name, comparison_value))
-                elif comparison_operation == "$lte":
-                    comparison_operations.append(LteOperation(field_name, comparison_value))
+                operation_class = _COMPARISON_OPERATIONS.get(comparison_operation)
+                if operation_class is not None:
+                    comparison_operations.append(operation_class(field_name, comparison_value))
 
         # No comparison operator is given, so we use the default operators "$in" if the comparison value is a list and
         # "$eq" in every other case
@@ -180,12 +293,11 @@ class ComparisonOperation(ABC):
 
         return comparison_operations
 
-    @abstractmethod
     def convert_to_elasticsearch(self):
         """
         Converts the ComparisonOperation instance to an Elasticsearch query.
         """
-        pass
+        raise NotImplementedError
 
 
 class NotOperation(LogicalFilterClause):
@@ -193,10 +305,41 @@ class NotOperation(LogicalFilterClause):
     Handles conversion of logical 'NOT' operations.
     """
 
+    __slots__ = ()
+
+    def __init__(self, conditions: List["LogicalFilterClause"]):
+        super().__init__(self._merge_range_operations(conditions))
+
+    @staticmethod
+    def _merge_range_operations(conditions: List["LogicalFilterClause"]) -> List["LogicalFilterClause"]:
+        """
+        Combines range operations on the same field into a single RangeOperation, so that a range given in separate
+        clauses (e.g. `[{"date": {"$gte": ...}}, {"date": {"$lt": ...}}]`) is negated as a whole.
+        """
+        merged_conditions = []
+        range_conditions: Dict[str, List[ComparisonOperation]] = {}
+        for condition in conditions:
+            if isinstance(condition, RangeOperation) or type(condition) in _RANGE_OPERATION_OPERATORS:
+                range_conditions.setdefault(condition.field_name, []).append(condition)
+            else:
+                merged_conditions.append(condition)
+
+        for field_name, field_conditions in range_conditions.items():
+            if len(field_conditions) == 1:
+                merged_conditions.append(field_conditions[0])
+                continue
+            range_clause = {}
+            for condition in field_conditions:
+                if isinstance(condition, RangeOperation):
+                    range_clause.update(condition.comparison_value)
+                else:
+                    range_clause[_RANGE_OPERATION_OPERATORS[type(condition)]] = condition.comparison_value
+            merged_conditions.append(RangeOperation(field_name, range_clause))
+
+        return merged_conditions
+
     def convert_to_elasticsearch(self):
-        conditions = [condition.convert_to_elasticsearch() for condition in self.conditions]
-        conditions = self._merge_es_range_queries(conditions)
-        return {"bool": {"must_not": conditions}}
+        return {"bool": {"must_not": [condition.convert_to_elasticsearch() for condition in self.conditions]}}
 
 
 class AndOperation(LogicalFilterClause):
@@ -204,10 +347,16 @@ class AndOperation(LogicalFilterClause):
     Handles conversion of logical 'AND' operations.
     """
 
+    __slots__ = ()
+
+    def __init__(self, conditions: List["LogicalFilterClause"]):
+        super().__init__(self._flatten_conditions(conditions))
+
     def convert_to_elasticsearch(self):
-        conditions = [condition.convert_to_elasticsearch() for condition in self.conditions]
-        conditions = self._merge_es_range_queries(conditions)
-        return {"bool": {"must": conditions}}
+        # A single condition doesn't need to be wrapped in a bool query
+        if len(self.conditions) == 1:
+            return self.conditions[0].convert_to_elasticsearch()
+        return {"bool": {"must": [condition.convert_to_elasticsearch() for condition in self.conditions]}}
 
 
 class OrOperation(LogicalFilterClause):
@@ -215,10 +364,16 @@ class OrOperation(LogicalFilterClause):
     Handles conversion of logical 'OR' operations.
     """
 
+    __slots__ = ()
+
+    def __init__(self, conditions: List["LogicalFilterClause"]):
+        super().__init__(self._flatten_conditions(conditions))
+
     def convert_to_elasticsearch(self):
-        conditions = [condition.convert_to_elasticsearch() for condition in self.conditions]
-        conditions = self._merge_es_range_queries(conditions)
-        return {"bool": {"should": conditions}}
+        # A single condition doesn't need to be wrapped in a bool query
+        if len(self.conditions) == 1:
+            return self.conditions[0].convert_to_elasticsearch()
+        return {"bool": {"should": [condition.convert_to_elasticsearch() for condition in self.conditions]}}
 
 
 class EqOperation(ComparisonOperation):
@@ -226,6 +381,8 @@ class EqOperation(ComparisonOperation):
     Handles conversion of the '$eq' comparison operation.
     """
 
+    __slots__ = ()
+
     def convert_to_elasticsearch(self):
         return {"term": {self.field_name: self.comparison_value}}
 
@@ -235,6 +392,8 @@ class InOperation(ComparisonOperation):
     Handles conversion of the '$in' comparison operation.
     """
 
+    __slots__ = ()
+
     def convert_to_elasticsearch(self):
         return {"terms": {self.field_name: self.comparison_value}}
 
@@ -244,6 +403,8 @@ class NeOperation(ComparisonOperation):
     Handles conversion of the '$ne' comparison operation.
     """
 
+    __slots__ = ()
+
     def convert_to_elasticsearch(self):
         return {"bool": {"must_not": {"term": {self.field_name: self.comparison_value}}}}
 
@@ -253,6 +414,8 @@ class NinOperation(ComparisonOperation):
     Handles conversion of the '$nin' comparison operation.
     """
 
+    __slots__ = ()
+
     def convert_to_elasticsearch(self):
         return {"bool": {"must_not": {"terms": {self.field_name: self.comparison_value}}}}
 
@@ -262,6 +425,8 @@ class GtOperation(ComparisonOperation):
     Handles conversion of the '$gt' comparison operation.
     """
 
+    __slots__ = ()
+
     def convert_to_elasticsearch(self):
         return {"range": {self.field_name: {"gt": self.comparison_value}}}
 
@@ -271,6 +436,8 @@ class GteOperation(ComparisonOperation):
     Handles conversion of the '$gte' comparison operation.
     """
 
+    __slots__ = ()
+
     def convert_to_elasticsearch(self):
         return {"range": {self.field_name: {"gte": self.comparison_value}}}
 
@@ -280,6 +447,8 @@ class LtOperation(ComparisonOperation):
     Handles conversion of the '$lt' comparison operation.
     """
 
+    __slots__ = ()
+
     def convert_to_elasticsearch(self):
         return {"range": {self.field_name: {"lt": self.comparison_value}}}
 
@@ -289,5 +458,51 @@ class LteOperation(ComparisonOperation):
     Handles conversion of the '$lte' comparison operation.
     """
 
+    __slots__ = ()
+
     def convert_to_elasticsearch(self):
         return {"range": {self.field_name: {"lte": self.comparison_value}}}
+
+
+class RangeOperation(ComparisonOperation):
+    """
+    Handles conversion of multiple range operations ('$gt', '$gte', '$lt', '$lte') on the same field. The comparison
+    value is a dictionary mapping each range operator to its comparison value.
+    """
+
+    __slots__ = ()
+
+    def convert_to_elasticsearch(self):
+        return {
+            "range": {
+                self.field_name: {
+                    comparison_operation[1:]: comparison_value
+                    for comparison_operation, comparison_value in self.comparison_value.items()
+                }
+            }
+        }
+
+
+# Lookup tables used by the parsers to map operator keys to the classes that handle them
+_LOGICAL_OPERATIONS: Dict[str, Type[LogicalFilterClause]] = {
+    "$not": NotOperation,
+    "$and": AndOperation,
+    "$or": OrOperation,
+}
+
+_COMPARISON_OPERATIONS: Dict[str, Type[ComparisonOperation]] = {
+    "$eq": EqOperation,
+    "$in": InOperation,
+    "$ne": NeOperation,
+    "$nin": NinOperation,
+    "$gt": GtOperation,
+    "$gte": GteOperation,
+    "$lt": LtOperation,
+    "$lte": LteOperation,
+}
+
+_RANGE_OPERATORS = {"$gt", "$gte", "$lt", "$lte"}
+
+_RANGE_OPERATION_OPERATORS: Dict[Type[ComparisonOperation], str] = {
+    _COMPARISON_OPERATIONS[operator]: operator for operator in _RANGE_OPERATORS
+}
@@ -342,16 +342,15 @@ class WeaviateDocumentStore(BaseDocumentStore):
         Transform Haystack filter conditions to Weaviate where filter clauses.
         """
         weaviate_filters = []
-        weaviate_filter = {}
         for key, values in filters.items():
-            for value in values:
-                weaviate_filter = {"path": [key], "operator": "Equal", "valueString": value}
-                weaviate_filters.append(weaviate_filter)
+            path = [key]
+            weaviate_filters.extend({"path": path, "operator": "Equal", "valueString": value} for value in values)
         if len(weaviate_filters) > 1:
-            filter_dict = {"operator": "Or", "operands": weaviate_filters}
-            return filter_dict
+            return {"operator": "Or", "operands": weaviate_filters}
+        elif weaviate_filters:
+            return weaviate_filters[0]
         else:
-            return weaviate_filter
+            return {}
 
     def _update_schema(self, new_prop: str, index: Optional[str] = None):
         """
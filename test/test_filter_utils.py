@@ -0,0 +1,208 @@
+import pytest
+
+from haystack.document_stores.filter_utils import (
+    convert_filters_to_elasticsearch,
+    LogicalFilterClause,
+    AndOperation,
+    OrOperation,
+    NotOperation,
+    EqOperation,
+    InOperation,
+    NeOperation,
+    NinOperation,
+    GtOperation,
+    GteOperation,
+    LtOperation,
+    LteOperation,
+    RangeOperation,
+)
+
+
+filters = [
+    (
+        {
+            "$and": {
+                "type": {"$eq": "article"},
+                "date": {"$gte": "2015-01-01", "$lt": "2021-01-01"},
+                "rating": {"$gte": 3},
+                "$or": {"genre": {"$in": ["economy", "politics"]}, "publisher": {"$eq": "nytimes"}},
+            }
+        }
+    ),
+    (
+        {
+            "type": "article",
+            "date": {"$gte": "2015-01-01", "$lt": "2021-01-01"},
+            "rating": {"$gte": 3},
+            "$or": {"genre": ["economy", "politics"], "publisher": "nytimes"},
+        }
+    ),
+]
+
+elasticsearch_filter = {
+    "bool": {
+        "must": [
+            {"term": {"type": "article"}},
+            {"range": {"date": {"gte": "2015-01-01", "lt": "2021-01-01"}}},
+            {"range": {"rating": {"gte": 3}}},
+            {"bool": {"should": [{"terms": {"genre": ["economy", "politics"]}}, {"term": {"publisher": "nytimes"}}]}},
+        ]
+    }
+}
+
+
+@pytest.mark.parametrize("filter_term", filters)
+def test_convert_to_elasticsearch(filter_term):
+    assert LogicalFilterClause.parse(filter_term).convert_to_elasticsearch() == elasticsearch_filter
+
+
+def test_parse_operators():
+    assert isinstance(LogicalFilterClause.parse({"$and": {"a": 1}}), AndOperation)
+    assert isinstance(LogicalFilterClause.parse({"$or": {"a": 1}}), OrOperation)
+    assert isinstance(LogicalFilterClause.parse({"$not": {"a": 1}}), NotOperation)
+
+    comparison_operations = {
+        "$eq": EqOperation,
+        "$in": InOperation,
+        "$ne": NeOperation,
+        "$nin": NinOperation,
+        "$gt": GtOperation,
+        "$gte": GteOperation,
+        "$lt": LtOperation,
+        "$lte": LteOperation,
+    }
+    for operator, operation_class in comparison_operations.items():
+        operation = LogicalFilterClause.parse({"a": {operator: 1}})
+        assert type(operation) == operation_class
+        assert operation.field_name == "a"
+        assert operation.comparison_value == 1
+
+
+def test_parse_default_operators():
+    assert isinstance(LogicalFilterClause.parse({"a": 1}), EqOperation)
+    assert isinstance(LogicalFilterClause.parse({"a": [1, 2]}), InOperation)
+
+
+def test_parse_range_operators_on_same_field():
+    filter_clause = LogicalFilterClause.parse(
+        {"date": {"$gte": "2015-01-01", "$ne": "2016-01-01", "$lt": "2021-01-01"}}
+    )
+    assert isinstance(filter_clause, AndOperation)
+    range_operation, ne_operation = filter_clause.conditions
+    assert isinstance(range_operation, RangeOperation)
+    assert range_operation.comparison_value == {"$gte": "2015-01-01", "$lt": "2021-01-01"}
+    assert isinstance(ne_operation, NeOperation)
+    assert range_operation.convert_to_elasticsearch() == {"range": {"date": {"gte": "2015-01-01", "lt": "2021-01-01"}}}
+
+
+def test_parse_flattens_nested_operations():
+    filter_clause = LogicalFilterClause.parse({"a": {"$gt": 1}, "$and": [{"b": 1}, {"$and": {"c": 1}}]})
+    assert isinstance(filter_clause, AndOperation)
+    assert [type(condition) for condition in filter_clause.conditions] == [GtOperation, EqOperation, EqOperation]
+
+    filter_clause = LogicalFilterClause.parse({"$or": {"a": 1, "$or": {"b": 1, "c": 1}, "$and": {"d": 1, "e": 1}}})
+    assert [type(condition) for condition in filter_clause.conditions] == [
+        EqOperation,
+        EqOperation,
+        EqOperation,
+        AndOperation,
+    ]
+
+    filter_clause = LogicalFilterClause.parse({"$not": {"$not": {"a": 1}}})
+    assert isinstance(filter_clause.conditions[0], NotOperation)
+
+
+def test_convert_not_with_separate_range_clauses_to_elasticsearch():
+    # The range is negated as a whole, i.e. documents with dates in [2015, 2021) are excluded
+    filter_term = {"$not": [{"date": {"$gte": "2015"}}, {"a": 1}, {"date": {"$lt": "2021"}}, {"b": {"$gt": 2}}]}
+    expected = {
+        "bool": {
+            "must_not": [
+                {"term": {"a": 1}},
+                {"range": {"date": {"gte": "2015", "lt": "2021"}}},
+                {"range": {"b": {"gt": 2}}},
+            ]
+        }
+    }
+    assert LogicalFilterClause.parse(filter_term).convert_to_elasticsearch() == expected
+    assert convert_filters_to_elasticsearch(filter_term) == expected
+
+
+def test_convert_to_elasticsearch_returns_new_filter():
+    filter_clause = LogicalFilterClause.parse({"$not": {"a": 1, "$or": {"b": 1, "c": 1}}})
+    first_conversion = filter_clause.convert_to_elasticsearch()
+    assert first_conversion == {
+        "bool": {"must_not": [{"term": {"a": 1}}, {"bool": {"should": [{"term": {"b": 1}}, {"term": {"c": 1}}]}}]}
+    }
+    first_conversion["bool"]["must_not"].clear()
+    assert filter_clause.convert_to_elasticsearch() == {
+        "bool": {"must_not": [{"term": {"a": 1}}, {"bool": {"should": [{"term": {"b": 1}}, {"term": {"c": 1}}]}}]}
+    }
+
+    comparison_operation = LogicalFilterClause.parse({"a": {"$gte": 1, "$lt": 5}})
+    comparison_operation.convert_to_elasticsearch()["range"]["a"].clear()
+    assert comparison_operation.convert_to_elasticsearch() == {"range": {"a": {"gte": 1, "lt": 5}}}
+
+
+def test_convert_single_condition_to_elasticsearch():
+    assert LogicalFilterClause.parse({"$and": {"a": 1}}).convert_to_elasticsearch() == {"term": {"a": 1}}
+    assert LogicalFilterClause.parse({"$or": {"a": [1, 2]}}).convert_to_elasticsearch() == {"terms": {"a": [1, 2]}}
+    assert LogicalFilterClause.parse({"$not": {"a": 1}}).convert_to_elasticsearch() == {
+        "bool": {"must_not": [{"term": {"a": 1}}]}
+    }
+
+
+def test_filter_clauses_have_no_instance_dict():
+    filter_clause = LogicalFilterClause.parse({"$or": {"a": {"$gte": 1}, "b": ["x", "y"]}})
+    assert not hasattr(filter_clause, "__dict__")
+    for condition in filter_clause.conditions:
+        assert not hasattr(condition, "__dict__")
+
+
+@pytest.mark.parametrize("filter_term", filters)
+def test_convert_filters_to_elasticsearch(filter_term):
+    assert convert_filters_to_elasticsearch(filter_term) == elasticsearch_filter
+    assert convert_filters_to_elasticsearch(filter_term) == elasticsearch_filter
+
+
+def test_convert_filters_to_elasticsearch_with_same_structure():
+    filter_term = {"date": {"$gte": "2015-01-01", "$lt": "2021-01-01"}, "$or": {"genre": ["economy"], "rating": 3}}
+    assert convert_filters_to_elasticsearch(filter_term) == {
+        "bool": {
+            "must": [
+                {"range": {"date": {"gte": "2015-01-01", "lt": "2021-01-01"}}},
+                {"bool": {"should": [{"terms": {"genre": ["economy"]}}, {"term": {"rating": 3}}]}},
+            ]
+        }
+    }
+    filter_term = {"date": {"$gte": "2019-01-01", "$lt": "2020-01-01"}, "$or": {"genre": ["politics"], "rating": 5}}
+    assert convert_filters_to_elasticsearch(filter_term) == {
+        "bool": {
+            "must": [
+                {"range": {"date": {"gte": "2019-01-01", "lt": "2020-01-01"}}},
+                {"bool": {"should": [{"terms": {"genre": ["politics"]}}, {"term": {"rating": 5}}]}},
+            ]
+        }
+    }
+
+
+def test_convert_filters_to_elasticsearch_distinguishes_value_types():
+    assert convert_filters_to_elasticsearch({"a": True}) == {"term": {"a": True}}
+    assert convert_filters_to_elasticsearch({"a": 1}) == {"term": {"a": 1}}
+    assert type(convert_filters_to_elasticsearch({"a": 1})["term"]["a"]) == int
+    assert convert_filters_to_elasticsearch({"a": [1]}) == {"terms": {"a": [1]}}
+    assert convert_filters_to_elasticsearch({"a": (1,)}) == {"term": {"a": (1,)}}
+
+
+def test_convert_filters_to_elasticsearch_with_unhashable_value():
+    assert convert_filters_to_elasticsearch({"a": {"$eq": {1, 2}}}) == {"term": {"a": {1, 2}}}
+
+
+def test_convert_deeply_nested_filters_to_elasticsearch():
+    filter_term = {"a": 1}
+    for level in range(100):
+        filter_term = {"$and" if level % 2 else "$or": {f"field_{level}": level, **filter_term}}
+    assert (
+        convert_filters_to_elasticsearch(filter_term)
+        == LogicalFilterClause.parse(filter_term).convert_to_elasticsearch()
+    )